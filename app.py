@@ -1,10 +1,18 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, make_response
 from metro_graph import MetroGraph
 from dmrc_api import DMRCApi
 import os
 import logging
-from functools import wraps
-from datetime import datetime
+import threading
+import time
+from collections import deque
+from functools import lru_cache, wraps
+from itertools import chain
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to Flask's encoder
+    orjson = None
 
 # Configure logging
 logging.basicConfig(
@@ -14,9 +22,38 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Rate limiting (simple in-memory implementation)
-request_counts = {}
+
+def ojsonify(data):
+    """Like jsonify, but serializes with orjson when it's installed."""
+    if orjson is None:
+        return jsonify(data)
+    return app.response_class(orjson.dumps(data), mimetype="application/json")
+
+
+# Rate limiting (simple in-memory sliding window)
+# Each client IP keeps a deque of its request timestamps from the last minute
+request_times = {}
 RATE_LIMIT = 60  # requests per minute
+RATE_WINDOW = 60  # seconds
+SWEEP_INTERVAL = 300  # seconds between sweeps of idle clients
+_last_sweep = time.monotonic()
+_sweep_lock = threading.Lock()
+
+
+def _sweep_request_times(now):
+    """Drop clients that haven't made a request within the window."""
+    global _last_sweep
+    # Under a threaded server several requests can decide to sweep at once;
+    # only the first one through the lock does the work
+    with _sweep_lock:
+        if now - _last_sweep <= SWEEP_INTERVAL:
+            return
+        _last_sweep = now
+        cutoff = now - RATE_WINDOW
+        for client_ip in list(request_times):
+            timestamps = request_times.get(client_ip)
+            if not timestamps or timestamps[-1] < cutoff:
+                request_times.pop(client_ip, None)
 
 
 def rate_limit(f):
@@ -25,27 +62,36 @@ def rate_limit(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         client_ip = request.remote_addr
-        current_minute = datetime.now().strftime("%Y-%m-%d-%H-%M")
-        key = f"{client_ip}:{current_minute}"
+        now = time.monotonic()
 
-        request_counts[key] = request_counts.get(key, 0) + 1
+        if now - _last_sweep > SWEEP_INTERVAL:
+            _sweep_request_times(now)
 
-        if request_counts[key] > RATE_LIMIT:
+        # Forget requests that have slid out of the window. setdefault is
+        # atomic, so concurrent first requests from one client share a deque.
+        timestamps = request_times.setdefault(client_ip, deque())
+        cutoff = now - RATE_WINDOW
+        while timestamps and timestamps[0] < cutoff:
+            timestamps.popleft()
+
+        if len(timestamps) >= RATE_LIMIT:
             logger.warning(f"Rate limit exceeded for {client_ip}")
-            return jsonify(
+            return ojsonify(
                 {
                     "status": "error",
                     "message": "Too many requests. Please try again later.",
                 }
             ), 429
 
+        timestamps.append(now)
         return f(*args, **kwargs)
 
     return decorated_function
 
 
-# Initialize the local MetroGraph first
-metro_network = MetroGraph()
+# Initialize the local MetroGraph first. Every shortest path is precomputed
+# in a background thread so the app can start serving straight away.
+metro_network = MetroGraph(precompute_routes=True, precompute_in_background=True)
 
 # Use DMRC API if API key is available, otherwise fallback to local data
 if os.getenv("DMRC_API_KEY"):
@@ -65,30 +111,43 @@ def home():
     popular_stations = metro_network.get_popular_stations()
     interchange_stations = metro_network.get_interchange_stations()
 
-    return render_template(
-        "index.html",
-        stations=stations,
-        popular_stations=popular_stations,
-        interchange_stations=interchange_stations,
-        last_updated=metro_network.last_updated.strftime("%B %Y"),
+    response = make_response(
+        render_template(
+            "index.html",
+            stations=stations,
+            popular_stations=popular_stations,
+            interchange_stations=interchange_stations,
+            last_updated=metro_network.last_updated.strftime("%B %Y"),
+        )
     )
 
+    # Let browsers revalidate with the ETag instead of re-downloading the page
+    response.headers["Cache-Control"] = "public, max-age=300"
+    response.add_etag()
+    return response.make_conditional(request)
+
 
 @app.route("/api/search_stations", methods=["GET"])
 def search_stations():
     """Search stations by partial name match."""
     query = request.args.get("q", "").strip()
     if len(query) < 2:
-        return jsonify({"stations": []})
+        return ojsonify({"stations": []})
+
+    matches = _search_stations_cached(query.lower())
+    return ojsonify({"stations": list(matches)})
 
-    matches = metro_network.search_stations(query)
-    return jsonify({"stations": matches})
+
+@lru_cache(maxsize=1024)
+def _search_stations_cached(query):
+    """Cache search results per query, since autocomplete repeats them a lot."""
+    return tuple(metro_network.search_stations(query))
 
 
 @app.route("/api/popular_stations", methods=["GET"])
 def get_popular_stations():
     """Get list of popular stations."""
-    return jsonify(
+    return ojsonify(
         {
             "popular": metro_network.get_popular_stations(),
             "interchanges": metro_network.get_interchange_stations(),
@@ -103,7 +162,7 @@ def find_route():
     data = request.get_json()
 
     if not data:
-        return jsonify({"status": "error", "message": "Invalid request data"}), 400
+        return ojsonify({"status": "error", "message": "Invalid request data"}), 400
 
     source = data.get("source", "").strip()
     destination = data.get("destination", "").strip()
@@ -113,7 +172,7 @@ def find_route():
 
     # Validation
     if not source or not destination:
-        return jsonify(
+        return ojsonify(
             {
                 "status": "error",
                 "message": "Please select both source and destination stations",
@@ -122,72 +181,78 @@ def find_route():
 
     # Check for same station
     if source.lower() == destination.lower():
-        return jsonify(
+        return ojsonify(
             {
                 "status": "error",
                 "message": "Source and destination cannot be the same station",
             }
         ), 400
 
-    # Check if stations exist in the network
-    all_stations = metro_service.get_all_stations()
-    all_stations_lower = {s.lower(): s for s in all_stations}
-
-    if source.lower() not in all_stations_lower:
-        return jsonify(
+    # Check if stations exist in the network, normalizing their names
+    source_name = metro_network.stations_lower.get(source.lower())
+    if source_name is None:
+        return ojsonify(
             {
                 "status": "error",
                 "message": f'Station "{source}" not found. Please check the spelling.',
             }
         ), 404
 
-    if destination.lower() not in all_stations_lower:
-        return jsonify(
+    destination_name = metro_network.stations_lower.get(destination.lower())
+    if destination_name is None:
+        return ojsonify(
             {
                 "status": "error",
                 "message": f'Station "{destination}" not found. Please check the spelling.',
             }
         ), 404
 
-    # Normalize station names
-    source = all_stations_lower[source.lower()]
-    destination = all_stations_lower[destination.lower()]
+    source, destination = source_name, destination_name
 
     try:
         # Find routes based on requested type
         if route_type == "all":
             routes = metro_network.find_all_routes(source, destination)
             if not routes:
-                return jsonify(
+                return ojsonify(
                     {
                         "status": "error",
                         "message": f"No route found between {source} and {destination}.",
                     }
                 ), 404
 
-            # Format all routes for response
-            formatted_routes = []
-            for route in routes:
-                fare_info = metro_network.calculate_fare(route.distance, use_smart_card)
-                station_lines = _get_station_lines(route.path)
-                summary = metro_network.get_route_summary(
-                    route.path, route.distance, route.line_changes
-                )
+            # Routes often share stations and distances, so look each up once
+            lines_by_station = metro_network.station_lines_frozen
+            station_entries = {
+                station: {
+                    "station": station,
+                    "lines": lines_by_station.get(station, ()),
+                }
+                for station in set(chain.from_iterable(r.path for r in routes))
+            }
+            fares = {
+                distance: metro_network.calculate_fare(distance, use_smart_card)
+                for distance in {r.distance for r in routes}
+            }
 
-                formatted_routes.append(
-                    {
-                        "route_type": route.route_type,
-                        "path": route.path,
-                        "distance": route.distance,
-                        "stations_count": len(route.path),
-                        "station_lines": station_lines,
-                        "line_changes": route.line_changes,
-                        "fare": fare_info,
-                        "estimated_time": summary["estimated_time_min"],
-                    }
-                )
+            # Format all routes for response
+            formatted_routes = [
+                {
+                    "route_type": route.route_type,
+                    "path": route.path,
+                    "distance": route.distance,
+                    "stations_count": len(route.path),
+                    "station_lines": [station_entries[s] for s in route.path],
+                    "line_changes": route.line_changes,
+                    "fare": fares[route.distance],
+                    "estimated_time": metro_network.estimate_travel_time(
+                        len(route.path), len(route.line_changes)
+                    ),
+                }
+                for route in routes
+            ]
 
-            return jsonify(
+            return ojsonify(
                 {
                     "status": "success",
                     "routes": formatted_routes,
@@ -207,7 +272,7 @@ def find_route():
                 )
 
             if not path:
-                return jsonify(
+                return ojsonify(
                     {
                         "status": "error",
                         "message": f"No route found between {source} and {destination}.",
@@ -220,10 +285,7 @@ def find_route():
             # Get station line information
             station_lines = _get_station_lines(path)
 
-            # Get route summary
-            summary = metro_network.get_route_summary(path, distance, line_changes)
-
-            return jsonify(
+            return ojsonify(
                 {
                     "status": "success",
                     "path": path,
@@ -232,14 +294,16 @@ def find_route():
                     "station_lines": station_lines,
                     "line_changes": line_changes,
                     "fare": fare_info,
-                    "estimated_time": summary["estimated_time_min"],
+                    "estimated_time": metro_network.estimate_travel_time(
+                        len(path), len(line_changes)
+                    ),
                     "route_type": route_type,
                 }
             )
 
     except Exception as e:
         logger.exception(f"Error finding route from {source} to {destination}: {e}")
-        return jsonify(
+        return ojsonify(
             {
                 "status": "error",
                 "message": "An unexpected error occurred. Please try again.",
@@ -249,38 +313,24 @@ def find_route():
 
 def _get_station_lines(path):
     """Helper function to get line information for each station in path."""
-    station_lines = []
-    for station in path:
-        lines = metro_network.station_lines.get(station, [])
-        station_lines.append({"station": station, "lines": lines})
-    return station_lines
+    lines_by_station = metro_network.station_lines_frozen
+    return [
+        {"station": station, "lines": lines_by_station.get(station, ())}
+        for station in path
+    ]
 
 
 @app.route("/api/station_info/<station_name>", methods=["GET"])
 def get_station_info(station_name):
     """Get detailed information about a specific station."""
-    stations = metro_network.get_all_stations()
-    stations_lower = {s.lower(): s for s in stations}
-
-    if station_name.lower() not in stations_lower:
-        return jsonify({"status": "error", "message": "Station not found"}), 404
+    actual_name = metro_network.stations_lower.get(station_name.lower())
+    if actual_name is None:
+        return ojsonify({"status": "error", "message": "Station not found"}), 404
 
-    actual_name = stations_lower[station_name.lower()]
-    lines = metro_network.station_lines.get(actual_name, [])
-    is_interchange = len(lines) > 1
-
-    # Get connected stations
-    connected = list(metro_network.graph.get(actual_name, {}).keys())
-
-    return jsonify(
+    return ojsonify(
         {
             "status": "success",
-            "station": {
-                "name": actual_name,
-                "lines": lines,
-                "is_interchange": is_interchange,
-                "connected_stations": connected,
-            },
+            "station": metro_network.get_station_info(actual_name),
         }
     )
 
@@ -292,24 +342,14 @@ def get_network_stats():
     total_lines = len(metro_network.lines)
     interchange_count = len(metro_network.get_interchange_stations())
 
-    # Calculate total track length (approximate)
-    total_distance = 0
-    counted_edges = set()
-    for station, neighbors in metro_network.graph.items():
-        for neighbor, distance in neighbors.items():
-            edge = tuple(sorted([station, neighbor]))
-            if edge not in counted_edges:
-                total_distance += distance
-                counted_edges.add(edge)
-
-    return jsonify(
+    return ojsonify(
         {
             "status": "success",
             "stats": {
                 "total_stations": total_stations,
                 "total_lines": total_lines,
                 "interchange_stations": interchange_count,
-                "total_track_km": round(total_distance, 2),
+                "total_track_km": metro_network.total_track_km,
                 "last_updated": metro_network.last_updated.strftime("%Y-%m-%d"),
             },
         }
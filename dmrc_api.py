@@ -1,12 +1,55 @@
+import bisect
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import os
-from datetime import datetime
+import re
+import threading
+import time
+from collections import OrderedDict
 from dotenv import load_dotenv
+from metro_graph import FARE_BINS, FARES
 
 # Load environment variables from .env file
 load_dotenv()
 
+
+class TTLCache:
+    """Small LRU cache whose entries expire after a fixed number of seconds"""
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expiry, value), oldest first
+        # Threaded servers share one cache, and expiry and eviction both
+        # delete entries another request may be looking at
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or None if it's missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expiry, value = entry
+            if expiry <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
 class DMRCApi:
     """Class to handle interactions with the DMRC API"""
     
@@ -15,29 +58,59 @@ class DMRCApi:
         self.api_key = os.getenv('DMRC_API_KEY')
         self.base_url = 'https://api.dmrc.co.in/v1'  # Example base URL
         self.metro_graph_instance = metro_graph_instance # Store the MetroGraph instance
+        self.timeout = 10  # Seconds before giving up on an API call
         self.headers = {
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
+
+        # Reuse one session so keep-alive connections (and TLS) are shared
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        self._session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=64))
         
         # Cache for API responses to reduce API calls
-        self.cache = {}
-        self.cache_expiry = {}  # Store expiry timestamps for cache items
         self.cache_duration = 3600  # Cache duration in seconds (1 hour)
+        self.cache = TTLCache(maxsize=1024, ttl=self.cache_duration)
         
+        # First two stations on each line, used as mock train destinations.
+        # Without a MetroGraph yet, they're built on first use instead.
+        self._line_destinations = (
+            self._build_line_destinations(metro_graph_instance)
+            if metro_graph_instance else None
+        )
+
+        # Mock endpoint dispatch tables
+        self._mock_handlers = {
+            'stations': self._mock_stations,
+            'routes/find': self._mock_route,
+            'fares/calculate': self._mock_fare,
+            'alerts': self._mock_alerts,
+        }
+        self._mock_station_handlers = [
+            (re.compile(r'^stations/([^/]+)/lines$'), self._mock_station_lines),
+            (re.compile(r'^stations/([^/]+)/schedule$'), self._mock_schedule),
+        ]
+
         # Print a message if using dummy key
         if self.api_key == 'dummy_api_key_for_testing':
             print("Using mock API mode with simulated responses")
     
     def _make_request(self, endpoint, method='GET', params=None, data=None):
         """Make a request to the DMRC API with error handling and caching"""
-        # Create cache key based on endpoint and parameters
-        cache_key = f"{endpoint}_{json.dumps(params) if params else ''}_{json.dumps(data) if data else ''}"
+        # Create cache key based on endpoint and parameters. Sorting the keys
+        # lets the same parameters in any order share an entry, and json
+        # copes with list and dict values that a tuple key can't hash.
+        cache_key = (
+            endpoint,
+            json.dumps(params, sort_keys=True) if params else '',
+            json.dumps(data, sort_keys=True) if data else '',
+        )
         
         # Check if response is in cache and not expired
-        current_time = datetime.now().timestamp()
-        if cache_key in self.cache and self.cache_expiry.get(cache_key, 0) > current_time:
-            return self.cache[cache_key]
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Check if we're using a dummy API key (for development/testing)
         if self.api_key == 'dummy_api_key_for_testing':
@@ -48,9 +121,9 @@ class DMRCApi:
         url = f"{self.base_url}/{endpoint}"
         try:
             if method == 'GET':
-                response = requests.get(url, headers=self.headers, params=params)
+                response = self._session.get(url, params=params, timeout=self.timeout)
             elif method == 'POST':
-                response = requests.post(url, headers=self.headers, json=data)
+                response = self._session.post(url, json=data, timeout=self.timeout)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
@@ -58,8 +131,7 @@ class DMRCApi:
             result = response.json()
             
             # Cache the response
-            self.cache[cache_key] = result
-            self.cache_expiry[cache_key] = current_time + self.cache_duration
+            self.cache.set(cache_key, result)
             
             return result
         except requests.exceptions.RequestException as e:
@@ -70,10 +142,18 @@ class DMRCApi:
     def get_all_stations(self):
         """Get a list of all stations in the Delhi Metro network"""
         try:
+            # The sorted list is cached next to the raw responses, so it
+            # expires along with them
+            cached = self.cache.get('all_stations')
+            if cached is not None:
+                return cached
+
             response = self._make_request('stations')
             if response and 'data' in response:
                 # Extract station names from the API response
-                return sorted([station['name'] for station in response['data']])
+                stations = sorted([station['name'] for station in response['data']])
+                self.cache.set('all_stations', stations)
+                return stations
             return []
         except Exception as e:
             print(f"Error fetching stations: {e}")
@@ -153,18 +233,7 @@ class DMRCApi:
     
     def _calculate_fare_locally(self, distance):
         """Fallback method to calculate fare locally if the API is unavailable"""
-        if distance <= 2:
-            return 10
-        elif distance <= 5:
-            return 20
-        elif distance <= 12:
-            return 30
-        elif distance <= 21:
-            return 40
-        elif distance <= 32:
-            return 50
-        else:
-            return 60
+        return FARES[bisect.bisect_left(FARE_BINS, distance)]
     
     def get_train_schedule(self, station_name, line=None):
         """Get train schedule for a specific station and optionally filter by line"""
@@ -202,109 +271,128 @@ class DMRCApi:
 
         metro_graph = self.metro_graph_instance # Use the stored instance
 
-        # Mock station list
-        if endpoint == 'stations':
-            # Use all stations from MetroGraph for comprehensive station list
-            all_stations = metro_graph.get_all_stations()
+        # Fixed endpoints map straight to their handler
+        handler = self._mock_handlers.get(endpoint)
+        if handler:
+            return handler(metro_graph, params, data)
 
-            # Convert to the format expected by the API
-            return {
-                'data': [{'name': station} for station in all_stations]
-            }
-        
-        # Mock station lines
-        elif endpoint.startswith('stations/') and endpoint.endswith('/lines'):
-            station_name = endpoint.split('/')[1]
-            # Use MetroGraph to get accurate line information for all stations
-            lines = metro_graph.station_lines.get(station_name, [])
-            return {'data': lines}
+        # Per-station endpoints (stations/<name>/lines, stations/<name>/schedule)
+        for pattern, handler in self._mock_station_handlers:
+            match = pattern.match(endpoint)
+            if match:
+                return handler(metro_graph, match.group(1))
 
-        # Mock route finding
-        elif endpoint == 'routes/find':
-            source = data.get('source') if data else None
-            destination = data.get('destination') if data else None
+        # Default empty response
+        return {'data': []}
 
-            # Use the actual MetroGraph instance to find the route
-            path, distance, line_changes = metro_graph.find_shortest_path(source, destination)
-            
-            if not path:
-                return {'data': {'stations': [], 'distance': 0, 'line_changes': []}}
-            
-            # Convert path to the format expected by the API
-            stations = [{'name': station} for station in path]
-            
-            # Return the actual route data
-            return {
-                'data': {
-                    'stations': stations,
-                    'distance': distance,
-                    'line_changes': line_changes
-                }
-            }
+    def _mock_stations(self, metro_graph, params, data):
+        """Mock station list"""
+        # Use all stations from MetroGraph for comprehensive station list
+        all_stations = metro_graph.get_all_stations()
+
+        # Convert to the format expected by the API
+        return {
+            'data': [{'name': station} for station in all_stations]
+        }
+
+    def _mock_station_lines(self, metro_graph, station_name):
+        """Mock station lines"""
+        # Use MetroGraph to get accurate line information for all stations
+        lines = metro_graph.station_lines.get(station_name, [])
+        return {'data': lines}
+
+    def _mock_route(self, metro_graph, params, data):
+        """Mock route finding"""
+        source = data.get('source') if data else None
+        destination = data.get('destination') if data else None
+
+        # Use the actual MetroGraph instance to find the route
+        path, distance, line_changes = metro_graph.find_shortest_path(source, destination)
         
-        # Mock fare calculation
-        elif endpoint == 'fares/calculate':
-            distance = params.get('distance', 0)
-            return {'data': {'fare': self._calculate_fare_locally(distance)}}
+        if not path:
+            return {'data': {'stations': [], 'distance': 0, 'line_changes': []}}
         
-        # Mock train schedule
-        elif endpoint.startswith('stations/') and endpoint.endswith('/schedule'):
-            station_name = endpoint.split('/')[1]
+        # Convert path to the format expected by the API
+        stations = [{'name': station} for station in path]
+        
+        # Return the actual route data
+        return {
+            'data': {
+                'stations': stations,
+                'distance': distance,
+                'line_changes': line_changes
+            }
+        }
 
-            # Get the lines for this station from MetroGraph
-            station_lines = metro_graph.station_lines.get(station_name, [])
+    def _mock_fare(self, metro_graph, params, data):
+        """Mock fare calculation"""
+        distance = params.get('distance', 0)
+        return {'data': {'fare': self._calculate_fare_locally(distance)}}
 
-            if not station_lines:
-                return {'data': []}
-            
-            # Generate realistic schedules based on the actual lines at this station
-            schedules = []
-            current_hour = 10  # Start at 10 AM for mock data
-            
-            for line in station_lines:
-                # For each line, add a few upcoming trains
-                for i in range(2):  # 2 trains per line
-                    minute = (i * 7) + (hash(line) % 10)  # Distribute minutes based on line name
-                    
-                    # Find a destination station on this line
-                    destination = None
-                    for dest, lines in metro_graph.station_lines.items():
-                        if line in lines and dest != station_name:
-                            destination = dest
-                            break
-                    
-                    if not destination:
-                        continue
-                        
-                    # Format time
-                    departure_time = f"{current_hour}:{minute:02d} {'AM' if current_hour < 12 else 'PM'}"
-                    
-                    schedules.append({
-                        'line': line,
-                        'destination': destination,
-                        'departure_time': departure_time
-                    })
-            
-            return {'data': schedules}
+    def _build_line_destinations(self, metro_graph):
+        """Map each line to its first two stations, for mock destinations"""
+        # Filled in locally and returned whole, so a concurrent request never
+        # sees a half-built mapping
+        line_destinations = {}
+        for dest, lines in metro_graph.station_lines.items():
+            for line in lines:
+                candidates = line_destinations.setdefault(line, [])
+                if len(candidates) < 2:
+                    candidates.append(dest)
+        return line_destinations
+
+    def _mock_schedule(self, metro_graph, station_name):
+        """Mock train schedule"""
+        # Get the lines for this station from MetroGraph
+        station_lines = metro_graph.station_lines.get(station_name, [])
+
+        if not station_lines:
+            return {'data': []}
         
-        # Mock service alerts
-        elif endpoint == 'alerts':
-            return {
-                'data': [
-                    {
-                        'line': 'Blue Line',
-                        'type': 'Delay',
-                        'message': 'Minor delays due to technical issue',
-                        'timestamp': '2023-08-15T09:30:00Z'
-                    },
-                    {
-                        'line': 'Magenta Line',
-                        'type': 'Maintenance',
-                        'message': 'Planned maintenance work on Sunday',
-                        'timestamp': '2023-08-14T18:00:00Z'
-                    }
-                ]
-            }
+        if self._line_destinations is None:
+            self._line_destinations = self._build_line_destinations(metro_graph)
+
+        # Generate realistic schedules based on the actual lines at this station
+        schedules = []
+        current_hour = 10  # Start at 10 AM for mock data
+        period = 'AM' if current_hour < 12 else 'PM'
         
-        # Default empty response
-        return {'data': []}
+        for line in station_lines:
+            # Find a destination station on this line
+            destination = next(
+                (dest for dest in self._line_destinations.get(line, []) if dest != station_name),
+                None
+            )
+            if not destination:
+                continue
+
+            # For each line, add a few upcoming trains
+            for i in range(2):  # 2 trains per line
+                minute = (i * 7) + (hash(line) % 10)  # Distribute minutes based on line name
+                
+                schedules.append({
+                    'line': line,
+                    'destination': destination,
+                    'departure_time': f"{current_hour}:{minute:02d} {period}"
+                })
+        
+        return {'data': schedules}
+
+    def _mock_alerts(self, metro_graph, params, data):
+        """Mock service alerts"""
+        return {
+            'data': [
+                {
+                    'line': 'Blue Line',
+                    'type': 'Delay',
+                    'message': 'Minor delays due to technical issue',
+                    'timestamp': '2023-08-15T09:30:00Z'
+                },
+                {
+                    'line': 'Magenta Line',
+                    'type': 'Maintenance',
+                    'message': 'Planned maintenance work on Sunday',
+                    'timestamp': '2023-08-14T18:00:00Z'
+                }
+            ]
+        }
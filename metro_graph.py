@@ -1,7 +1,14 @@
+import bisect
 import heapq
 import logging
-from typing import Dict, List, Set, Tuple, Optional
+import sys
+import threading
+from array import array
+from collections import deque
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Set, Tuple, Optional
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
 
 # Configure logging
@@ -10,15 +17,63 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# DMRC fare slabs: upper distance limit (km) of each slab and its token fare.
+# Anything beyond the last limit falls into the final ₹60 slab.
+FARE_BINS = (2, 5, 12, 21, 32)
+FARES = (10, 20, 30, 40, 50, 60)
+# Smart card fare for each slab: 10% off, rounded down
+SMART_CARD_FARES = tuple(fare * 9 // 10 for fare in FARES)
 
-@dataclass
+# Distance to stations the searches haven't reached yet
+INF = float("infinity")
+
+
+@dataclass(slots=True)
 class RouteResult:
     """Data class for route finding results"""
 
     path: List[str]
     distance: float
     line_changes: List[dict]
-    route_type: str = "shortest"  # shortest, least_changes, direct
+    route_type: str = "shortest"  # shortest, least_changes, alternative, direct
+
+
+@dataclass(slots=True, frozen=True)
+class RouteSummary:
+    """Data class for a human-readable route summary"""
+
+    start: str
+    end: str
+    stations_count: int
+    distance_km: float
+    estimated_time_min: int
+    line_changes_count: int
+    fare: dict
+
+    def to_dict(self) -> dict:
+        """Return the summary as a plain dict, e.g. for a JSON response."""
+        return {
+            "start": self.start,
+            "end": self.end,
+            "stations_count": self.stations_count,
+            "distance_km": self.distance_km,
+            "estimated_time_min": self.estimated_time_min,
+            "line_changes_count": self.line_changes_count,
+            "fare": self.fare,
+        }
+
+
+class _TrieNode:
+    """Node of the station-search trie."""
+
+    __slots__ = ("children", "station_mask")
+
+    def __init__(self):
+        # None once pruned, for nodes that only one station passes through
+        self.children: Optional[Dict[str, "_TrieNode"]] = {}
+        # Stations whose name contains this prefix, as a bitmask (bit i is
+        # set for the station with id i)
+        self.station_mask = 0
 
 
 class MetroGraph:
@@ -48,16 +103,152 @@ class MetroGraph:
         "Lajpat Nagar",
     ]
 
-    def __init__(self):
+    # Fare details for each slab, without and with a smart card. Callers
+    # only read them, so the same dicts are handed out on every call.
+    FARE_INFO = {
+        use_smart_card: tuple(
+            {
+                "token_fare": token_fare,
+                "smart_card_fare": smart_card_fare,
+                "savings": token_fare - smart_card_fare,
+                "recommended_fare": smart_card_fare if use_smart_card else token_fare,
+            }
+            for token_fare, smart_card_fare in zip(FARES, SMART_CARD_FARES)
+        )
+        for use_smart_card in (False, True)
+    }
+
+    def __init__(
+        self, precompute_routes: bool = False, precompute_in_background: bool = False
+    ):
         # Initialize the graph as an adjacency list
         self.graph: Dict[str, Dict[str, float]] = {}
         self.stations: Set[str] = set()
         self.station_lines: Dict[str, List[str]] = {}  # Map stations to their lines
         self.lines: Dict[str, List[str]] = {}  # Store line information
+        # Lines running over each edge: station -> neighbor -> [line names]
+        self.edge_lines: Dict[str, Dict[str, List[str]]] = {}
         self.last_updated = datetime(2026, 1, 11)  # Data last verified date
 
         # Initialize with Delhi Metro stations and connections
         self._initialize_metro_network()
+
+        # The network never changes after this point (the route caches rely
+        # on that), so hand out the graph as read-only views
+        self.graph: Mapping[str, Mapping[str, float]] = MappingProxyType(
+            {
+                station: MappingProxyType(neighbors)
+                for station, neighbors in self.graph.items()
+            }
+        )
+
+        # Network-wide values that never change after initialization
+        self._sorted_stations = tuple(sorted(self.stations))
+        self._build_csr()
+        self._landmark_distances = self._build_landmarks()
+        self.total_track_km = self._compute_total_track_km()
+        self.station_lines_frozen: Dict[str, Tuple[str, ...]] = {
+            station: tuple(lines) for station, lines in self.station_lines.items()
+        }
+
+        # Integer line ids, in the order the lines were added
+        self.line_names: Tuple[str, ...] = tuple(self.lines)
+        self.line_ids: Dict[str, int] = {
+            line: i for i, line in enumerate(self.line_names)
+        }
+        # Lines running over each track segment as a bitmask (bit i is set
+        # for the line with id i), indexed by station id and then neighbor
+        # id, so shared lines along a path are a single integer AND
+        self._edge_masks: List[Dict[int, int]] = [
+            {
+                self.station_ids[neighbor]: sum(
+                    1 << self.line_ids[line] for line in lines
+                )
+                for neighbor, lines in self.edge_lines[station].items()
+            }
+            for station in self.station_names
+        ]
+        # Line names for each mask seen so far, filled in by _lines_in_mask
+        self._mask_line_names: Dict[int, Tuple[str, ...]] = {}
+
+        # Least-changes search states, one per (station, line through it).
+        # Each station's states are numbered consecutively, so they form a
+        # range, and stations only get states for lines that serve them.
+        self._state_station: List[int] = []
+        self._state_line: List[int] = []
+        self._station_states: List[range] = []
+        state_ids: Dict[Tuple[int, int], int] = {}
+        for station_id, station in enumerate(self.station_names):
+            first_state = len(self._state_station)
+            for line in self.station_lines[station]:
+                state_ids[station_id, self.line_ids[line]] = len(self._state_station)
+                self._state_station.append(station_id)
+                self._state_line.append(self.line_ids[line])
+            self._station_states.append(range(first_state, len(self._state_station)))
+
+        # Each station's edges split per line, as (next_state, distance,
+        # line_id) triples, for the least-changes search
+        self._line_edge_rows: List[Tuple[Tuple[int, float, int], ...]] = [
+            tuple(
+                (
+                    state_ids[self.station_ids[neighbor], self.line_ids[line]],
+                    distance,
+                    self.line_ids[line],
+                )
+                for neighbor, distance in self.graph[station].items()
+                for line in self.edge_lines[station][neighbor]
+            )
+            for station in self.station_names
+        ]
+        self._popular_stations = tuple(
+            sys.intern(s) for s in self.POPULAR_STATIONS if s in self.stations
+        )
+        self._interchange_stations = tuple(
+            sorted(s for s, lines in self.station_lines.items() if len(lines) > 1)
+        )
+
+        # Per-station details served by the station info endpoint
+        self._station_info: Dict[str, dict] = {
+            station: {
+                "name": station,
+                "lines": lines,
+                "is_interchange": len(lines) > 1,
+                "connected_stations": list(self.graph.get(station, {}).keys()),
+            }
+            for station, lines in self.station_lines.items()
+        }
+
+        # Normalized (lowercase) name -> actual name, used for case-insensitive
+        # lookups here and in the web app
+        self.stations_lower: Dict[str, str] = {
+            self._normalize_station_name(s): s for s in self.stations
+        }
+
+        # Build the search index once so autocomplete doesn't scan every station
+        self._station_names_lower: Tuple[str, ...] = tuple(
+            name.lower() for name in self.station_names
+        )
+        self._search_trie = self._build_search_trie()
+
+        # Route caches - the network never changes after initialization, so
+        # repeated queries for the same pair are just a dictionary lookup
+        self._shortest_path_cache = lru_cache(maxsize=4096)(self._search_shortest_path)
+        self._least_changes_cache = lru_cache(maxsize=4096)(self._search_least_changes)
+        self._alternatives_cache = lru_cache(maxsize=1024)(self._search_alternatives)
+
+        # All-pairs shortest path tables, indexed by station id (optional)
+        self._all_pairs_distance: Optional[List[array]] = None
+        self._all_pairs_previous: Optional[List[array]] = None
+        self._precompute_thread: Optional[threading.Thread] = None
+        if precompute_routes and precompute_in_background:
+            # Start answering queries right away with live searches, and
+            # switch to the tables once the background thread fills them
+            self._precompute_thread = threading.Thread(
+                target=self._precompute_routes, name="route-precompute", daemon=True
+            )
+            self._precompute_thread.start()
+        elif precompute_routes:
+            self._precompute_routes()
         logger.info(f"MetroGraph initialized with {len(self.stations)} stations")
 
     def _initialize_metro_network(self) -> None:
@@ -347,119 +538,288 @@ class MetroGraph:
             ("Najafgarh", "Dhansa Bus Stand", 1.1),
         ]
 
-        # Add all metro lines to the graph
-        all_lines = (
-            yellow_line
-            + blue_line
-            + blue_line_branch
-            + red_line
-            + green_line
-            + green_line_branch
-            + violet_line
-            + magenta_line
-            + pink_line
-            + grey_line
-        )  # Removed direct_connections
-
-        # Store line information
-        self.lines = {
-            "Yellow": [
-                station
-                for station1, station2, _ in yellow_line
-                for station in [station1, station2]
-            ],
-            "Blue": [
-                station
-                for station1, station2, _ in blue_line
-                for station in [station1, station2]
-            ],
-            "Blue Branch": [
-                station
-                for station1, station2, _ in blue_line_branch
-                for station in [station1, station2]
-            ],
-            "Red": [
-                station
-                for station1, station2, _ in red_line
-                for station in [station1, station2]
-            ],
-            "Green": [
-                station
-                for station1, station2, _ in green_line
-                for station in [station1, station2]
-            ],
-            "Green Branch": [
-                station
-                for station1, station2, _ in green_line_branch
-                for station in [station1, station2]
-            ],
-            "Violet": [
-                station
-                for station1, station2, _ in violet_line
-                for station in [station1, station2]
-            ],
-            "Magenta": [
-                station
-                for station1, station2, _ in magenta_line
-                for station in [station1, station2]
-            ],
-            "Pink": [
-                station
-                for station1, station2, _ in pink_line
-                for station in [station1, station2]
-            ],
-            "Grey": [
-                station
-                for station1, station2, _ in grey_line
-                for station in [station1, station2]
-            ],
+        intern = sys.intern
+
+        # Metro lines and their track segments, in the order they're added
+        line_edges = {
+            "Yellow": yellow_line,
+            "Blue": blue_line,
+            "Blue Branch": blue_line_branch,
+            "Red": red_line,
+            "Green": green_line,
+            "Green Branch": green_line_branch,
+            "Violet": violet_line,
+            "Magenta": magenta_line,
+            "Pink": pink_line,
+            "Grey": grey_line,
+        }
+
+        # Build the graph, line and station information in a single pass
+        for line_name, edges in line_edges.items():
+            line_stations = self.lines[line_name] = []
+
+            for station1, station2, distance in edges:
+                # Intern names so every structure shares one string per station
+                station1, station2 = intern(station1), intern(station2)
+
+                # Add stations to the set of all stations
+                self.stations.add(station1)
+                self.stations.add(station2)
+
+                # Add the edge in both directions (undirected graph)
+                self.graph.setdefault(station1, {})[station2] = distance
+                self.graph.setdefault(station2, {})[station1] = distance
+
+                # Record which lines serve each edge (in both directions)
+                self.edge_lines.setdefault(station1, {}).setdefault(
+                    station2, []
+                ).append(line_name)
+                self.edge_lines.setdefault(station2, {}).setdefault(
+                    station1, []
+                ).append(line_name)
+
+                # Map stations to their lines, listing each station once per line
+                for station in (station1, station2):
+                    lines = self.station_lines.setdefault(station, [])
+                    if line_name not in lines:
+                        lines.append(line_name)
+                        line_stations.append(station)
+
+    def _build_search_trie(self) -> _TrieNode:
+        """
+        Build a suffix trie over lowercased station names.
+
+        Every suffix of every name is inserted, so walking the trie with a
+        query lands on the node holding all stations that contain it. Most
+        nodes lie below a point only one station passes through, so those
+        subtrees are pruned and search_stations checks that station's name.
+        """
+        root = _TrieNode()
+        for station_id, name in enumerate(self._station_names_lower):
+            station_bit = 1 << station_id
+            for i in range(len(name)):
+                node = root
+                for char in name[i:]:
+                    child = node.children.get(char)
+                    if child is None:
+                        child = node.children[char] = _TrieNode()
+                    node = child
+                    node.station_mask |= station_bit
+
+        # Prune everything below the first node on each branch that only
+        # one station passes through
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.station_mask & (node.station_mask - 1) == 0 and node is not root:
+                node.children = None  # At most one bit set
+            else:
+                stack.extend(node.children.values())
+        return root
+
+    def get_all_stations(self) -> Tuple[str, ...]:
+        """Return all stations in the network, sorted by name."""
+        return self._sorted_stations
+
+    def _build_csr(self) -> None:
+        """
+        Build a compressed sparse row (CSR) copy of the graph.
+
+        Stations get integer ids in sorted-name order. The neighbors of
+        station i are indices[indptr[i]:indptr[i + 1]], with the matching
+        edge lengths in weights. Each row is sorted by edge length, so a
+        search can stop scanning a row once the edges get too long. The
+        arrays are contiguous C arrays, which take far less memory than
+        nested dicts.
+        """
+        self.station_names: Tuple[str, ...] = self._sorted_stations
+        self.station_ids: Dict[str, int] = {
+            station: i for i, station in enumerate(self.station_names)
         }
 
-        # Build the graph
-        for station1, station2, distance in all_lines:
-            # Add stations to the set of all stations
-            self.stations.add(station1)
-            self.stations.add(station2)
-
-            # Add edges to the graph (undirected graph)
-            if station1 not in self.graph:
-                self.graph[station1] = {}
-            if station2 not in self.graph:
-                self.graph[station2] = {}
-
-            # Add the edge in both directions (undirected graph)
-            self.graph[station1][station2] = distance
-            self.graph[station2][station1] = distance
-
-        # Map stations to their lines
-        for line_name, stations in self.lines.items():
-            for station in stations:
-                if station not in self.station_lines:
-                    self.station_lines[station] = []
-                if line_name not in self.station_lines[station]:
-                    self.station_lines[station].append(line_name)
-
-    def get_all_stations(self) -> List[str]:
-        """Return a sorted list of all stations in the network."""
-        return sorted(list(self.stations))
-
-    def get_popular_stations(self) -> List[str]:
-        """Return list of popular/major interchange stations."""
-        return [s for s in self.POPULAR_STATIONS if s in self.stations]
+        self.indptr = array("i", [0])
+        self.indices = array("i")
+        self.weights = array("d")
+        for station in self.station_names:
+            edges = sorted(self.graph[station].items(), key=lambda edge: edge[1])
+            for neighbor, distance in edges:
+                self.indices.append(self.station_ids[neighbor])
+                self.weights.append(distance)
+            self.indptr.append(len(self.indices))
+
+        # Each station's CSR row as a tuple of (neighbor_id, distance) pairs.
+        # Iterating a tuple row is much cheaper in the interpreter than
+        # indexing the arrays edge by edge, so the searches use these.
+        self._neighbor_rows: List[Tuple[Tuple[int, float], ...]] = [
+            tuple(
+                zip(
+                    self.indices[self.indptr[i] : self.indptr[i + 1]],
+                    self.weights[self.indptr[i] : self.indptr[i + 1]],
+                )
+            )
+            for i in range(len(self.station_names))
+        ]
+
+    def _single_source_shortest_paths(self, source_id: int) -> Tuple[array, array]:
+        """
+        Run Dijkstra's algorithm from one station to every other station
+        over the CSR arrays.
+
+        Returns:
+            Tuple of (distance, previous) arrays indexed by station id, where
+            previous is -1 for the source and unreachable stations
+        """
+        neighbor_rows = self._neighbor_rows
+        distance = array("d", [INF]) * len(self.station_names)
+        previous = array("i", [-1]) * len(self.station_names)
+        distance[source_id] = 0
+
+        pq = [(0, source_id)]
+        while pq:
+            current_dist, current = heapq.heappop(pq)
+            if current_dist > distance[current]:
+                continue
+            for neighbor, edge_distance in neighbor_rows[current]:
+                new_distance = current_dist + edge_distance
+                if new_distance < distance[neighbor]:
+                    distance[neighbor] = new_distance
+                    previous[neighbor] = current
+                    heapq.heappush(pq, (new_distance, neighbor))
+
+        return distance, previous
+
+    def _build_landmarks(self) -> List[Tuple[float, float, float, float]]:
+        """
+        Pick four landmark stations spread across the network and record
+        every station's distance to each of them, for the A* heuristic.
+
+        Landmarks are chosen greedily: each one is the station farthest from
+        the landmarks picked so far, which tends to land on line termini.
+
+        Returns:
+            List indexed by station id of (d1, d2, d3, d4) landmark distances
+        """
+        n = len(self.station_names)
+        if n == 0:
+            return []
+
+        # Start from the station farthest from an arbitrary one
+        distance, _ = self._single_source_shortest_paths(0)
+        rows = []
+        nearest = [INF] * n
+        for _ in range(4):
+            landmark = max(
+                range(n), key=lambda i: distance[i] if distance[i] < INF else -1
+            )
+            distance, _ = self._single_source_shortest_paths(landmark)
+            rows.append(distance)
+            nearest = [min(a, b) for a, b in zip(nearest, distance)]
+            distance = nearest
+
+        # Unreachable stations get 0, which keeps the heuristic admissible
+        return [tuple(row[i] if row[i] < INF else 0 for row in rows) for i in range(n)]
+
+    def precompute_all_pairs(self) -> None:
+        """
+        Precompute shortest distances and predecessors between every pair
+        of stations, so find_shortest_path becomes a table walk.
+
+        This builds the same tables as Floyd-Warshall, but running Dijkstra
+        from each station costs O(V * E log V) instead of O(V^3), which is
+        much faster on a sparse network like the metro.
+        """
+        distances, previous = [], []
+        for source_id in range(len(self.station_names)):
+            distance_row, previous_row = self._single_source_shortest_paths(source_id)
+            distances.append(distance_row)
+            previous.append(previous_row)
+
+        # Searches check _all_pairs_previous, so publish it last
+        self._all_pairs_distance = distances
+        self._all_pairs_previous = previous
+        self._shortest_path_cache.cache_clear()
+        logger.info(f"Precomputed shortest paths for {len(distances)} stations")
+
+    def _precompute_routes(self) -> None:
+        """Build the all-pairs tables, then warm the popular-route caches."""
+        self.precompute_all_pairs()
+        self.precompute_popular_routes()
+
+    def precompute_popular_routes(self) -> None:
+        """
+        Warm the route caches for every pair of popular and interchange
+        stations, which make up most real queries.
+
+        Both caches are keyed on unordered pairs, so each pair is computed
+        once and serves find_all_routes in either direction.
+        """
+        hubs = sorted(set(self._popular_stations) | set(self._interchange_stations))
+        for i, start in enumerate(hubs):
+            for end in hubs[i + 1 :]:
+                self._shortest_path_cache(start, end)
+                self._least_changes_cache(start, end)
+        logger.info(f"Precomputed routes between {len(hubs)} popular stations")
+
+    def _compute_total_track_km(self) -> float:
+        """Sum the length of every track segment, counting each edge once."""
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        total_distance = 0
+        for station_id in range(len(self.station_names)):
+            for k in range(indptr[station_id], indptr[station_id + 1]):
+                # Each edge is stored in both directions; count it from the lower id
+                if indices[k] > station_id:
+                    total_distance += weights[k]
+        return round(total_distance, 2)
+
+    def get_station_info(self, station: str) -> Optional[dict]:
+        """Return lines and connections for a station (exact name), or None."""
+        return self._station_info.get(station)
+
+    def get_popular_stations(self) -> Tuple[str, ...]:
+        """Return popular/major interchange stations."""
+        return self._popular_stations
 
     def search_stations(self, query: str) -> List[str]:
         """Search stations by partial name match (case-insensitive)."""
         if not query or len(query) < 2:
             return []
         query_lower = query.lower()
-        matches = [s for s in self.stations if query_lower in s.lower()]
-        # Sort by relevance: stations starting with query first
-        matches.sort(key=lambda s: (not s.lower().startswith(query_lower), s))
-        return matches[:10]  # Return top 10 matches
 
-    def get_interchange_stations(self) -> List[str]:
+        # Walk the trie one character at a time, until it runs out or
+        # reaches a pruned node with a single station below it
+        node = self._search_trie
+        for char in query_lower:
+            if node.children is None:
+                break
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        # Decode the station ids from the node's bitmask, lowest bit first
+        station_ids = []
+        mask = node.station_mask
+        while mask:
+            lowest = mask & -mask
+            station_ids.append(lowest.bit_length() - 1)
+            mask ^= lowest
+
+        # A pruned node only matched part of the query, so check the rest
+        names_lower = self._station_names_lower
+        if node.children is None:
+            station_ids = [i for i in station_ids if query_lower in names_lower[i]]
+
+        # Sort by relevance: stations starting with query first. Ids follow
+        # sorted-name order, so ties are broken alphabetically.
+        matches = sorted(
+            station_ids,
+            key=lambda i: (not names_lower[i].startswith(query_lower), i),
+        )
+        names = self.station_names
+        return [names[i] for i in matches[:10]]  # Return top 10 matches
+
+    def get_interchange_stations(self) -> Tuple[str, ...]:
         """Return stations that connect multiple lines."""
-        return sorted([s for s, lines in self.station_lines.items() if len(lines) > 1])
+        return self._interchange_stations
 
     def calculate_fare(self, distance: float, use_smart_card: bool = False) -> dict:
         """
@@ -480,32 +840,12 @@ class MetroGraph:
             use_smart_card: Whether to apply smart card discount
 
         Returns:
-            Dictionary with token_fare, smart_card_fare, and savings
-        """
-        # Calculate base token fare using DMRC's slab structure
-        if distance <= 2:
-            token_fare = 10
-        elif distance <= 5:
-            token_fare = 20
-        elif distance <= 12:
-            token_fare = 30
-        elif distance <= 21:
-            token_fare = 40
-        elif distance <= 32:
-            token_fare = 50
-        else:  # Above 32 km
-            token_fare = 60
-
-        # Smart card users get 10% discount (rounded down)
-        smart_card_fare = int(token_fare * 0.9)
-        savings = token_fare - smart_card_fare
-
-        return {
-            "token_fare": token_fare,
-            "smart_card_fare": smart_card_fare,
-            "savings": savings,
-            "recommended_fare": smart_card_fare if use_smart_card else token_fare,
-        }
+            Dictionary with token_fare, smart_card_fare, and savings (shared
+            between calls, so treat it as read-only)
+        """
+        # Find the slab with DMRC's limits, then read its precomputed fares
+        slab = bisect.bisect_left(FARE_BINS, distance)
+        return self.FARE_INFO[bool(use_smart_card)][slab]
 
     def _normalize_station_name(self, name: str) -> str:
         """Normalize station name for matching."""
@@ -513,23 +853,20 @@ class MetroGraph:
             return ""
         return name.strip().lower()
 
-    def _get_station_mapping(self) -> Dict[str, str]:
-        """Create a mapping of normalized names to actual station names."""
-        return {self._normalize_station_name(s): s for s in self.stations}
-
     def find_shortest_path(
         self, start: str, end: str
     ) -> Tuple[List[str], float, List[dict]]:
         """
         Find the shortest path between start and end stations using
-        Dijkstra's algorithm with a min-heap for O(E log V) performance.
+        A* search with min-heaps for O(E log V) performance.
 
         How it works:
-        1. Start at the source station with distance 0
-        2. Visit the nearest unvisited station
+        1. Start at the source with distance 0
+        2. Visit the station with the smallest distance plus estimated
+           distance to go (a landmark-based lower bound)
         3. Update distances to all its neighbors
-        4. Repeat until we reach the destination
-        5. Reconstruct the path by backtracking
+        4. Stop as soon as the destination is visited
+        5. Reconstruct the path by backtracking from the destination
 
         Args:
             start: Starting station name
@@ -544,7 +881,7 @@ class MetroGraph:
 
         try:
             # Normalize station names (handle case sensitivity, spaces, etc.)
-            station_map = self._get_station_mapping()
+            station_map = self.stations_lower
             start_norm = self._normalize_station_name(start)
             end_norm = self._normalize_station_name(end)
 
@@ -564,77 +901,7 @@ class MetroGraph:
                 logger.error(f"Station not in graph: start='{start}', end='{end}'")
                 return [], 0, []
 
-            # === DIJKSTRA'S ALGORITHM IMPLEMENTATION ===
-
-            # Step 1: Initialize distances (all stations start at infinity except source)
-            distances = {station: float("infinity") for station in self.stations}
-            distances[start] = 0
-
-            # Step 2: Keep track of the path (which station did we come from?)
-            previous = {station: None for station in self.stations}
-
-            # Step 3: Priority queue - always process the nearest station first
-            # Format: (distance_from_start, station_name)
-            pq = [(0, start)]
-            visited = set()
-
-            # Step 4: Process stations in order of distance from start
-            while pq:
-                # Get the station with minimum distance
-                current_dist, current = heapq.heappop(pq)
-
-                # Skip if we've already processed this station
-                # (heap may contain duplicates with different distances)
-                if current in visited:
-                    continue
-
-                visited.add(current)
-
-                # Optimization: Stop early if we've reached our destination
-                if current == end:
-                    break
-
-                # Skip outdated entries (we found a better path already)
-                if current_dist > distances[current]:
-                    continue
-
-                # Step 5: Update distances to all neighboring stations
-                for neighbor, edge_distance in self.graph[current].items():
-                    # Skip if we've already processed this neighbor
-                    if neighbor in visited:
-                        continue
-
-                    # Calculate new distance via current station
-                    new_distance = current_dist + edge_distance
-
-                    # If this path is shorter than what we knew before, update it!
-                    if new_distance < distances[neighbor]:
-                        distances[neighbor] = new_distance
-                        previous[neighbor] = current  # Remember how we got here
-                        heapq.heappush(pq, (new_distance, neighbor))
-
-            # Check if we actually found a path
-            if distances[end] == float("infinity"):
-                logger.warning(f"No path found from '{start}' to '{end}'")
-                return [], 0, []
-
-            # Step 6: Reconstruct the path by backtracking from end to start
-            path = []
-            current = end
-            while current:
-                path.append(current)
-                current = previous[current]  # Go backwards through the path
-            path.reverse()  # Flip it to go start -> end
-
-            # Step 7: Figure out where we need to change metro lines
-            line_changes = self._identify_line_changes(path)
-
-            total_distance = round(distances[end], 2)
-            logger.info(
-                f"Route found: {len(path)} stations, {total_distance} km, {len(line_changes)} changes"
-            )
-
-            return path, total_distance, line_changes
+            return self._cached_route(self._shortest_path_cache, start, end)
 
         except Exception as e:
             logger.exception(f"Error finding path: {e}")
@@ -644,7 +911,7 @@ class MetroGraph:
         self, start: str, end: str
     ) -> Tuple[List[str], float, List[dict]]:
         """
-        Find route with minimum line changes using modified BFS.
+        Find route with minimum line changes using 0-1 BFS.
         Prioritizes staying on the same line over shorter distance.
 
         Args:
@@ -658,7 +925,7 @@ class MetroGraph:
             return [], 0, []
 
         try:
-            station_map = self._get_station_mapping()
+            station_map = self.stations_lower
             start_norm = self._normalize_station_name(start)
             end_norm = self._normalize_station_name(end)
 
@@ -668,51 +935,225 @@ class MetroGraph:
             start = station_map[start_norm]
             end = station_map[end_norm]
 
-            # BFS with state: (station, current_lines, changes_count)
-            # Priority: (changes, distance, station, path, current_lines)
-            pq = [(0, 0, start, [start], frozenset(self.station_lines.get(start, [])))]
-            visited = {}  # station -> min changes to reach it
+            return self._cached_route(self._least_changes_cache, start, end)
 
-            while pq:
-                changes, dist, current, path, current_lines = heapq.heappop(pq)
+        except Exception as e:
+            logger.exception(f"Error finding least-changes route: {e}")
+            return [], 0, []
 
-                if current == end:
-                    line_changes = self._identify_line_changes(path)
-                    return path, round(dist, 2), line_changes
+    def _cached_route(
+        self, cache, start: str, end: str, with_line_changes: bool = True
+    ) -> Tuple[List[str], float, Optional[List[dict]]]:
+        """
+        Look up a route in one of the route caches.
+
+        The network is undirected, so each cache holds one entry per station
+        pair (keyed in name order). A query in the other direction reverses
+        the cached path and works out its own line changes, unless
+        with_line_changes is False, in which case it returns None for them.
+        Cached line changes are copied on the way out, so callers can't
+        alter them.
+        """
+        # A station to itself needs no search, and no cache entry
+        if start == end:
+            return [start], 0, []
+
+        if start <= end:
+            path, distance, line_changes = cache(start, end)
+            return list(path), distance, [dict(change) for change in line_changes]
+
+        path, distance, _ = cache(end, start)
+        path = list(reversed(path))
+        if not with_line_changes:
+            return path, distance, None
+        path_ids = [self.station_ids[station] for station in path]
+        return path, distance, self._identify_line_changes(path_ids)
+
+    def _search_shortest_path(
+        self, start: str, end: str
+    ) -> Tuple[Tuple[str, ...], float, Tuple[dict, ...]]:
+        """Run A* search between two (normalized) station names."""
+        if self._all_pairs_previous is not None:
+            return self._lookup_all_pairs(start, end)
+
+        # === A* SEARCH WITH LANDMARKS ===
+        # Like Dijkstra, but stations are taken from the queue in order of
+        # distance so far plus a lower bound on the distance still to go,
+        # so the search heads straight for the end instead of spreading out
+        # in every direction. The bound comes from the triangle inequality:
+        # for any landmark L, dist(v, end) >= |dist(L, end) - dist(L, v)|.
+        # Runs on integer station ids over the CSR rows; names are only
+        # used again when the final path is built.
+        start_id = self.station_ids[start]
+        end_id = self.station_ids[end]
+        n = len(self.station_names)
+
+        # Step 1: Distances and previous stations
+        dist = [INF] * n
+        prev = [-1] * n
+        dist[start_id] = 0
+        pq = [(0, 0, start_id)]
+
+        # Local aliases keep attribute lookups out of the inner loop
+        neighbor_rows = self._neighbor_rows
+        landmarks = self._landmark_distances
+        heappush, heappop = heapq.heappush, heapq.heappop
+        end_l1, end_l2, end_l3, end_l4 = landmarks[end_id]
+
+        while pq:
+            # Step 2: Get the station with the smallest estimated route length
+            _, current_dist, current = heappop(pq)
+
+            # Stop once the end is reached - its distance is now final
+            if current == end_id:
+                break
+
+            # Skip outdated entries (we found a better path already)
+            if current_dist > dist[current]:
+                continue
 
-                state_key = (current, current_lines)
-                if state_key in visited and visited[state_key] <= changes:
-                    continue
-                visited[state_key] = changes
+            # Step 3: Update distances to all neighboring stations. Rows are
+            # sorted by edge length, so once a neighbor can't beat the best
+            # route found to the end so far, none of the later ones can.
+            for neighbor, edge_distance in neighbor_rows[current]:
+                new_distance = current_dist + edge_distance
+                if new_distance >= dist[end_id]:
+                    break
+                if new_distance < dist[neighbor]:
+                    dist[neighbor] = new_distance
+                    prev[neighbor] = current
+                    l1, l2, l3, l4 = landmarks[neighbor]
+                    estimate = new_distance + max(
+                        abs(end_l1 - l1),
+                        abs(end_l2 - l2),
+                        abs(end_l3 - l3),
+                        abs(end_l4 - l4),
+                    )
+                    heappush(pq, (estimate, new_distance, neighbor))
 
-                for neighbor, edge_dist in self.graph[current].items():
-                    if neighbor in path:  # Avoid cycles
-                        continue
+        # Check if we actually found a path
+        if dist[end_id] == INF:
+            logger.warning(f"No path found from '{start}' to '{end}'")
+            return (), 0, ()
 
-                    neighbor_lines = frozenset(self.station_lines.get(neighbor, []))
-                    common_lines = current_lines & neighbor_lines
+        # Step 4: Reconstruct the path by following previous stations
+        path_ids = []
+        current = end_id
+        while current != -1:
+            path_ids.append(current)
+            current = prev[current]
+        path_ids.reverse()
+        path = [self.station_names[i] for i in path_ids]
 
-                    if common_lines:
-                        # No line change needed
-                        new_changes = changes
-                        new_lines = common_lines
-                    else:
-                        # Line change required
-                        new_changes = changes + 1
-                        new_lines = neighbor_lines
+        # Step 5: Figure out where we need to change metro lines
+        line_changes = self._identify_line_changes(path_ids)
 
-                    new_path = path + [neighbor]
-                    new_dist = dist + edge_dist
+        total_distance = round(dist[end_id], 2)
+        logger.info(
+            f"Route found: {len(path)} stations, {total_distance} km, {len(line_changes)} changes"
+        )
 
-                    heapq.heappush(
-                        pq, (new_changes, new_dist, neighbor, new_path, new_lines)
-                    )
+        return tuple(path), total_distance, tuple(line_changes)
 
-            return [], 0, []
+    def _lookup_all_pairs(
+        self, start: str, end: str
+    ) -> Tuple[Tuple[str, ...], float, Tuple[dict, ...]]:
+        """Read a shortest path out of the precomputed all-pairs tables."""
+        start_id = self.station_ids[start]
+        end_id = self.station_ids[end]
+        distance = self._all_pairs_distance[start_id][end_id]
+        if distance == INF:
+            logger.warning(f"No path found from '{start}' to '{end}'")
+            return (), 0, ()
+
+        # Backtrack from end to start through the predecessor row
+        previous = self._all_pairs_previous[start_id]
+        path_ids = []
+        current = end_id
+        while current != -1:
+            path_ids.append(current)
+            current = previous[current]
+        path_ids.reverse()
+
+        path = tuple(self.station_names[i] for i in path_ids)
+        return path, round(distance, 2), tuple(self._identify_line_changes(path_ids))
+
+    def _search_least_changes(
+        self, start: str, end: str
+    ) -> Tuple[Tuple[str, ...], float, Tuple[dict, ...]]:
+        """Run the least-changes 0-1 BFS between two (normalized) station names."""
+        # 0-1 BFS over (station, line) states: riding along the same
+        # line costs 0 changes, boarding a different line costs 1.
+        # Labels are (changes, distance) so ties go to the shorter route.
+        # Each state is a single int numbering a (station, line) pair that
+        # exists on the network, so labels and parent links live in flat
+        # lists instead of dicts, with no slots for lines a station isn't on.
+        state_station, state_line = self._state_station, self._state_line
+        size = len(state_station)
+        best_changes = [INF] * size
+        best_dist = [INF] * size
+        previous = [-1] * size  # state -> state we came from
+
+        queue = deque()
+        for state in self._station_states[self.station_ids[start]]:
+            best_changes[state] = 0
+            best_dist[state] = 0
+            queue.append(state)
+
+        line_edge_rows = self._line_edge_rows
+        end_states = self._station_states[self.station_ids[end]]
+        end_changes = INF  # fewest changes seen so far to reach the end
+        while queue:
+            state = queue.popleft()
+            current_line = state_line[state]
+            changes, dist = best_changes[state], best_dist[state]
+
+            # The deque hands out states in order of changes, so once we're
+            # past the fewest changes to the end, nothing left can beat it
+            # and the path is rebuilt from the parent links below
+            if changes > end_changes:
+                break
+            if state in end_states:
+                end_changes = min(end_changes, changes)
+                continue
 
-        except Exception as e:
-            logger.exception(f"Error finding least-changes route: {e}")
-            return [], 0, []
+            for next_state, edge_dist, edge_line in line_edge_rows[
+                state_station[state]
+            ]:
+                new_changes = changes if edge_line == current_line else changes + 1
+                new_dist = dist + edge_dist
+
+                known_changes = best_changes[next_state]
+                if new_changes > known_changes or (
+                    new_changes == known_changes and new_dist >= best_dist[next_state]
+                ):
+                    continue
+                best_changes[next_state] = new_changes
+                best_dist[next_state] = new_dist
+                previous[next_state] = state
+
+                # Same-line moves go to the front, transfers to the back
+                if new_changes == changes:
+                    queue.appendleft(next_state)
+                else:
+                    queue.append(next_state)
+
+        # Best way of arriving at the end station, on any line
+        state = min(end_states, key=lambda s: (best_changes[s], best_dist[s]))
+        if best_changes[state] != INF:
+            dist = best_dist[state]
+
+            path_ids = []
+            while state != -1:
+                path_ids.append(state_station[state])
+                state = previous[state]
+            path_ids.reverse()
+
+            path = tuple(self.station_names[i] for i in path_ids)
+            line_changes = self._identify_line_changes(path_ids)
+            return path, round(dist, 2), tuple(line_changes)
+
+        return (), 0, ()
 
     def find_all_routes(self, start: str, end: str) -> List[RouteResult]:
         """
@@ -720,7 +1161,8 @@ class MetroGraph:
 
         Returns routes optimized for:
         1. Shortest distance
-        2. Least line changes
+        2. Short alternatives that differ from it (Yen's algorithm)
+        3. Least line changes
 
         Args:
             start: Starting station name
@@ -743,81 +1185,301 @@ class MetroGraph:
                 )
             )
 
-        # Get least changes path
-        path2, dist2, changes2 = self.find_route_least_changes(start, end)
-        if path2:
-            # Only add if different from shortest path
-            if path2 != path1:
-                routes.append(
-                    RouteResult(
-                        path=path2,
-                        distance=dist2,
-                        line_changes=changes2,
-                        route_type="least_changes",
-                    )
+        # No alternatives to look for without a route, or for a station
+        # to itself
+        if len(path1) < 2:
+            return routes
+
+        # Get least changes path, between the station names the shortest
+        # path already resolved. A reversed cache hit only needs its line
+        # changes worked out if it turns out to be a different route.
+        start, end = path1[0], path1[-1]
+        path2, dist2, changes2 = self._cached_route(
+            self._least_changes_cache, start, end, with_line_changes=False
+        )
+
+        # Alternatives come next, skipping the least-changes route so it
+        # keeps its own label. Every search adds up edge lengths from the
+        # start in path order, so the same route gets the same distance,
+        # and a different distance settles it without comparing the paths
+        # station by station.
+        for route in self.find_k_shortest_paths(start, end)[1:]:
+            if route.distance != dist2 or route.path != path2:
+                routes.append(route)
+
+        # Only add if different from shortest path
+        if path2 and (dist2 != dist1 or path2 != path1):
+            if changes2 is None:
+                changes2 = self._identify_line_changes(
+                    [self.station_ids[station] for station in path2]
                 )
+            routes.append(
+                RouteResult(
+                    path=path2,
+                    distance=dist2,
+                    line_changes=changes2,
+                    route_type="least_changes",
+                )
+            )
 
         return routes
 
-    def _identify_line_changes(self, path: List[str]) -> List[dict]:
+    def find_k_shortest_paths(
+        self, start: str, end: str, k: int = 3, min_difference: float = 0.3
+    ) -> List[RouteResult]:
         """
-        Identify all line changes in a given path.
+        Find up to k short, meaningfully different routes using Yen's algorithm.
+
+        The first route is the shortest path, and the rest are ordered by
+        distance. Results are cached per station pair like the other routes.
+
+        Args:
+            start: Starting station name
+            end: Destination station name
+            k: Maximum number of routes to return
+            min_difference: Minimum Jaccard distance between kept routes
+
+        Returns:
+            List of RouteResult objects ordered by distance
+        """
+        path, _, _ = self.find_shortest_path(start, end)
+        if not path or k < 1:
+            return []
+
+        # Cached in name order, like _cached_route; the network is
+        # undirected, so the other direction just reverses each route
+        start, end = path[0], path[-1]
+        if start <= end:
+            found = self._alternatives_cache(start, end, k, min_difference)
+        else:
+            found = [
+                (path_ids[::-1], distance)
+                for path_ids, distance in self._alternatives_cache(
+                    end, start, k, min_difference
+                )
+            ]
+
+        names = self.station_names
+        return [
+            RouteResult(
+                path=[names[i] for i in path_ids],
+                distance=distance,
+                line_changes=self._identify_line_changes(path_ids),
+                route_type="shortest" if n == 0 else "alternative",
+            )
+            for n, (path_ids, distance) in enumerate(found)
+        ]
+
+    def _search_alternatives(
+        self, start: str, end: str, k: int, min_difference: float
+    ) -> Tuple[Tuple[Tuple[int, ...], float], ...]:
+        """
+        Run Yen's algorithm between two (normalized) station names.
+
+        How it works:
+        1. Start with the shortest path
+        2. For each station on the last path found, block the edges already
+           used from there by earlier paths with the same start, and search
+           again from that station (the "spur") to the end
+        3. Join the path up to the spur with each spur path to make
+           candidates, and take the shortest candidate as the next path
+        4. Keep a path only if its stations differ from every route kept so
+           far by at least min_difference (Jaccard distance)
+
+        Returns:
+            Tuple of (path of station ids, distance) pairs ordered by distance
+        """
+        path, _, _ = self._cached_route(self._shortest_path_cache, start, end)
+        if not path:
+            return ()
+
+        end_id = self.station_ids[end]
+        first = [self.station_ids[station] for station in path]
+        found = [first]  # Every path Yen's algorithm produced, in order
+        kept = [(first, set(first))]  # The ones different enough to return
+        candidates: List[Tuple[float, Tuple[int, ...]]] = []
+        seen = {tuple(first)}
+        graph, names = self.graph, self.station_names
+
+        # Bound the search in case few routes are different enough
+        for _ in range(k * 10):
+            if len(kept) == k:
+                break
+            last = found[-1]
+            root_distance = 0.0
+
+            for i in range(len(last) - 1):
+                spur, root = last[i], last[: i + 1]
+
+                # Don't reuse an edge an earlier path took from this same root
+                banned_edges = {
+                    (p[i], p[i + 1])
+                    for p in found
+                    if len(p) > i + 1 and p[: i + 1] == root
+                }
+                spur_path, spur_distance = self._restricted_shortest_path(
+                    spur, end_id, root[:-1], banned_edges
+                )
+                if spur_path:
+                    candidate = tuple(root[:-1] + spur_path)
+                    if candidate not in seen:
+                        seen.add(candidate)
+                        heapq.heappush(
+                            candidates, (root_distance + spur_distance, candidate)
+                        )
+
+                root_distance += graph[names[spur]][names[last[i + 1]]]
+
+            if not candidates:
+                break
+            _, next_path = heapq.heappop(candidates)
+            next_path = list(next_path)
+            found.append(next_path)
+
+            stations = set(next_path)
+            if all(
+                1 - len(stations & other) / len(stations | other) >= min_difference
+                for _, other in kept
+            ):
+                kept.append((next_path, stations))
+
+        return tuple(
+            (tuple(path_ids), round(self._path_distance(path_ids), 2))
+            for path_ids, _ in kept
+        )
+
+    def _path_distance(self, path_ids: List[int]) -> float:
+        """Add up the track lengths along a path of station ids."""
+        names = self.station_names
+        return sum(
+            self.graph[names[a]][names[b]] for a, b in zip(path_ids, path_ids[1:])
+        )
+
+    def _restricted_shortest_path(
+        self,
+        start_id: int,
+        end_id: int,
+        banned_stations: List[int],
+        banned_edges: Set[Tuple[int, int]],
+    ) -> Tuple[List[int], float]:
+        """
+        Run Dijkstra's algorithm between two station ids without passing
+        through banned stations or along banned (from, to) edges.
+
+        Returns:
+            Tuple of (path of station ids, distance), or ([], 0) if blocked
+        """
+        n = len(self.station_names)
+        dist = [INF] * n
+        prev = [-1] * n
+        dist[start_id] = 0
+        # Banned stations start out visited, so no edge ever improves them
+        for station_id in banned_stations:
+            dist[station_id] = -1
+
+        pq = [(0, start_id)]
+        neighbor_rows = self._neighbor_rows
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        while pq:
+            current_dist, current = heappop(pq)
+            if current == end_id:
+                break
+            if current_dist > dist[current]:
+                continue
+            for neighbor, edge_distance in neighbor_rows[current]:
+                if (current, neighbor) in banned_edges:
+                    continue
+                new_distance = current_dist + edge_distance
+                if new_distance < dist[neighbor]:
+                    dist[neighbor] = new_distance
+                    prev[neighbor] = current
+                    heappush(pq, (new_distance, neighbor))
+
+        if dist[end_id] == INF:
+            return [], 0
+
+        path = []
+        current = end_id
+        while current != -1:
+            path.append(current)
+            current = prev[current]
+        path.reverse()
+        return path, dist[end_id]
+
+    def _lines_in_mask(self, mask: int) -> Tuple[str, ...]:
+        """
+        Return the names of the lines whose bits are set in a line mask.
+
+        The tuples are cached per mask and shared between line changes, the
+        same way station_lines_frozen shares each station's lines.
+        """
+        names = self._mask_line_names.get(mask)
+        if names is None:
+            names = self._mask_line_names[mask] = tuple(
+                line for i, line in enumerate(self.line_names) if mask >> i & 1
+            )
+        return names
+
+    def _identify_line_changes(self, path_ids: List[int]) -> List[dict]:
+        """
+        Identify all line changes in a given path of station ids.
 
         For example, if you go:
-        Rajiv Chowk (Yellow) -> Patel Chowk (Yellow) -> Central Secretariat (Yellow + Violet)
+        Patel Chowk -> Central Secretariat (Yellow) -> Khan Market (Violet)
 
-        At Central Secretariat, you might switch from Yellow to Violet line.
-        This function detects those switches.
+        At Central Secretariat you have to switch from the Yellow to the
+        Violet line. This function detects those switches, using the lines
+        that run over each track segment of the path.
         """
         line_changes = []
-        current_lines = set()
+        if len(path_ids) < 2:
+            return line_changes
 
-        for i, station in enumerate(path):
-            station_lines = set(self.station_lines.get(station, []))
+        # First segment - just record which lines run over it
+        edge_masks = self._edge_masks
+        current_lines = edge_masks[path_ids[0]][path_ids[1]]
 
-            # First station - just record which lines are available
-            if i == 0:
-                current_lines = station_lines
-                continue
+        for i in range(1, len(path_ids) - 1):
+            next_lines = edge_masks[path_ids[i]][path_ids[i + 1]]
 
             # Check if we can continue on the same line
-            common_lines = current_lines & station_lines  # Set intersection
+            common_lines = current_lines & next_lines  # Bitwise AND
 
-            # If no common lines, we MUST change (different lines)
-            if not common_lines and current_lines and station_lines:
+            # If we can continue on same line, prefer that
+            if common_lines:
+                current_lines = common_lines
+            # If no common lines, we MUST change at this station
+            else:
                 line_changes.append(
                     {
-                        "station": station,
-                        "from_lines": list(current_lines),
-                        "to_lines": list(station_lines),
+                        "station": self.station_names[path_ids[i]],
+                        "from_lines": self._lines_in_mask(current_lines),
+                        "to_lines": self._lines_in_mask(next_lines),
                         "position": i,
                     }
                 )
-                current_lines = station_lines
-            # If we can continue on same line, prefer that
-            elif common_lines:
-                current_lines = common_lines
+                current_lines = next_lines
 
         return line_changes
 
+    def estimate_travel_time(self, stations_count: int, changes_count: int) -> int:
+        """Estimate travel time in minutes (2.5 min per station + 3 min per change)."""
+        return round(stations_count * 2.5 + changes_count * 3)
+
     def get_route_summary(
         self, path: List[str], distance: float, line_changes: List[dict]
-    ) -> dict:
-        """Generate a human-readable summary of a route."""
+    ) -> Optional[RouteSummary]:
+        """Generate a human-readable summary of a route, or None if there's no route."""
         if not path:
-            return {"error": "No route available"}
-
-        # Estimate travel time (average 2.5 min per station + 3 min per change)
-        travel_time = len(path) * 2.5 + len(line_changes) * 3
-
-        fare_info = self.calculate_fare(distance)
-
-        return {
-            "start": path[0],
-            "end": path[-1],
-            "stations_count": len(path),
-            "distance_km": distance,
-            "estimated_time_min": round(travel_time),
-            "line_changes_count": len(line_changes),
-            "fare": fare_info,
-        }
+            return None
+
+        return RouteSummary(
+            start=path[0],
+            end=path[-1],
+            stations_count=len(path),
+            distance_km=distance,
+            estimated_time_min=self.estimate_travel_time(len(path), len(line_changes)),
+            line_changes_count=len(line_changes),
+            fare=self.calculate_fare(distance),
+        )
@@ -408,6 +408,12 @@ document.addEventListener('DOMContentLoaded', function() {
         elements.resultDiv.scrollIntoView({ behavior: 'smooth', block: 'start' });
     }
     
+    const ROUTE_LABELS = {
+        shortest: '⚡ Fastest Route',
+        alternative: '🔀 Alternative Route',
+        least_changes: '🔄 Fewest Changes',
+    };
+
     function displayRouteComparison(routes) {
         state.currentRoute = routes[0];
         
@@ -416,7 +422,7 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Generate comparison cards
         elements.comparisonCards.innerHTML = routes.map((route, index) => {
-            const routeLabel = route.route_type === 'shortest' ? '⚡ Fastest Route' : '🔄 Fewest Changes';
+            const routeLabel = ROUTE_LABELS[route.route_type] || '🔄 Fewest Changes';
             const isSelected = index === 0;
             const fare = state.useSmartCard ? route.fare.smart_card_fare : route.fare.token_fare;
             
@@ -0,0 +1,73 @@
+"""
+Unit Tests for the DMRC API client
+Tests for the response cache shared between requests.
+"""
+
+import threading
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dmrc_api
+from dmrc_api import TTLCache
+
+
+class TestTTLCache:
+    """Tests for the expiring LRU response cache."""
+
+    def test_get_and_set(self):
+        """Test that a stored value comes back until it expires."""
+        cache = TTLCache(ttl=60)
+        cache.set('k', 'v')
+        assert cache.get('k') == 'v'
+        assert cache.get('missing') is None
+
+    def test_evicts_least_recently_used(self):
+        """Test that a full cache drops the entry used longest ago."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert len(cache) == 2
+
+    def test_concurrent_lookups_on_expired_key(self, monkeypatch):
+        """Test that two lookups racing on an expired entry both miss cleanly."""
+        cache = TTLCache(ttl=0)
+        cache.set('k', 'v')
+
+        results, errors = [], []
+
+        def lookup():
+            try:
+                results.append(cache.get('k'))
+            except Exception as e:
+                errors.append(e)
+
+        second = threading.Thread(target=lookup)
+        real_monotonic = time.monotonic
+
+        def monotonic():
+            # Run the second lookup while the first sits between its expiry
+            # check and removing the entry
+            if second.ident is None:
+                second.start()
+                second.join(timeout=0.2)
+            return real_monotonic()
+
+        monkeypatch.setattr(dmrc_api.time, 'monotonic', monotonic)
+        lookup()
+        second.join()
+
+        assert errors == []
+        assert results == [None, None]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -10,17 +10,29 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from metro_graph import MetroGraph, RouteResult
+from metro_graph import MetroGraph, RouteResult, RouteSummary
+
+
+@pytest.fixture(scope="session")
+def metro():
+    """
+    Create one MetroGraph instance shared by the whole test session.
+
+    Tests only query the graph and never change it, so sharing it is safe.
+    A test that needs a fresh graph should build its own MetroGraph.
+    """
+    return MetroGraph()
+
+
+@pytest.fixture(scope="session")
+def precomputed_metro():
+    """Create one MetroGraph with precomputed route tables for the session."""
+    return MetroGraph(precompute_routes=True)
 
 
 class TestMetroGraphInitialization:
     """Tests for MetroGraph initialization and data integrity."""
     
-    @pytest.fixture
-    def metro(self):
-        """Create a MetroGraph instance for testing."""
-        return MetroGraph()
-    
     def test_initialization(self, metro):
         """Test that MetroGraph initializes with stations."""
         assert len(metro.stations) > 0
@@ -57,14 +69,36 @@ class TestMetroGraphInitialization:
         rajiv_chowk_lines = metro.station_lines.get("Rajiv Chowk", [])
         assert len(rajiv_chowk_lines) >= 2, "Rajiv Chowk should have multiple lines"
 
+    def test_csr_matches_graph(self, metro):
+        """Test that the CSR arrays hold the same edges as the graph dict."""
+        for station, neighbors in metro.graph.items():
+            i = metro.station_ids[station]
+            start, end = metro.indptr[i], metro.indptr[i + 1]
+            csr_neighbors = {
+                metro.station_names[j]: w
+                for j, w in zip(metro.indices[start:end], metro.weights[start:end])
+            }
+            assert csr_neighbors == neighbors
+
+    def test_graph_is_read_only(self, metro):
+        """Test that the graph can't be changed behind the route caches."""
+        with pytest.raises(TypeError):
+            metro.graph["Fake Station"] = {}
+        with pytest.raises(TypeError):
+            metro.graph["Rajiv Chowk"]["Fake Station"] = 1.0
+
+    def test_station_info(self, metro):
+        """Test that station info matches the graph and line data."""
+        info = metro.get_station_info("Rajiv Chowk")
+        assert info["name"] == "Rajiv Chowk"
+        assert info["is_interchange"] is True
+        assert set(info["connected_stations"]) == set(metro.graph["Rajiv Chowk"])
+        assert metro.get_station_info("Fake Station") is None
+
 
 class TestFareCalculation:
     """Tests for fare calculation logic."""
     
-    @pytest.fixture
-    def metro(self):
-        return MetroGraph()
-    
     def test_fare_structure_0_2km(self, metro):
         """Test fare for 0-2 km."""
         fare = metro.calculate_fare(1.5)
@@ -111,14 +145,16 @@ class TestFareCalculation:
         assert fare_2['token_fare'] == 10
         assert fare_2_1['token_fare'] == 20
 
+    def test_fare_slab_upper_limits(self, metro):
+        """Test that each slab's upper limit is charged at that slab's fare."""
+        expected = {5: 20, 12: 30, 21: 40, 32: 50, 32.01: 60}
+        for distance, token_fare in expected.items():
+            assert metro.calculate_fare(distance)['token_fare'] == token_fare
+
 
 class TestRouteFinding:
     """Tests for route finding algorithms."""
     
-    @pytest.fixture
-    def metro(self):
-        return MetroGraph()
-    
     def test_same_station_returns_single_station(self, metro):
         """Test that searching from a station to itself returns empty path."""
         path, distance, changes = metro.find_shortest_path("Rajiv Chowk", "Rajiv Chowk")
@@ -150,6 +186,15 @@ class TestRouteFinding:
         assert len(path) > 0
         assert path[0] == "Chandni Chowk"
         assert path[-1] == "Barakhamba Road"
+
+    def test_line_change_at_interchange(self, metro):
+        """Test that a line change is reported at the interchange station."""
+        path, distance, changes = metro.find_shortest_path("Chandni Chowk", "Barakhamba Road")
+        assert len(changes) == 1
+        assert changes[0]["station"] == "Rajiv Chowk"
+        assert list(changes[0]["from_lines"]) == ["Yellow"]
+        assert list(changes[0]["to_lines"]) == ["Blue"]
+        assert path[changes[0]["position"]] == "Rajiv Chowk"
     
     def test_nonexistent_station(self, metro):
         """Test handling of non-existent station."""
@@ -164,6 +209,25 @@ class TestRouteFinding:
         assert path1 == path2
         assert dist1 == dist2
     
+    def test_reverse_direction(self, metro):
+        """Test that a reversed query returns the reversed route."""
+        path1, dist1, _ = metro.find_shortest_path("Rajiv Chowk", "Hauz Khas")
+        path2, dist2, _ = metro.find_shortest_path("Hauz Khas", "Rajiv Chowk")
+        assert path2 == path1[::-1]
+        assert dist1 == dist2
+
+    def test_repeated_query_not_affected_by_mutation(self, metro):
+        """Test that mutating a returned path doesn't corrupt cached routes."""
+        path, _, _ = metro.find_shortest_path("Rajiv Chowk", "Hauz Khas")
+        path.clear()
+        path_again, _, _ = metro.find_shortest_path("Rajiv Chowk", "Hauz Khas")
+        assert path_again[0] == "Rajiv Chowk"
+
+        _, _, changes = metro.find_shortest_path("Barakhamba Road", "Chandni Chowk")
+        changes[0]["station"] = "X"
+        _, _, changes_again = metro.find_shortest_path("Barakhamba Road", "Chandni Chowk")
+        assert changes_again[0]["station"] == "Rajiv Chowk"
+
     def test_distance_is_positive(self, metro):
         """Test that distances are always positive."""
         path, distance, _ = metro.find_shortest_path("Rajiv Chowk", "Kashmere Gate")
@@ -180,13 +244,48 @@ class TestRouteFinding:
                 f"Path discontinuity: {current} not connected to {next_station}"
 
 
+class TestPrecomputedRoutes:
+    """Tests for the precomputed all-pairs shortest path tables."""
+
+    def test_matches_dijkstra(self, precomputed_metro, metro):
+        """Test that table lookups agree with an on-demand Dijkstra search."""
+        for start, end in [
+            ("Dwarka Sector 21", "Noida City Centre"),
+            ("Samaypur Badli", "Botanical Garden"),
+            ("Rajiv Chowk", "Kashmere Gate"),
+        ]:
+            path, distance, _ = precomputed_metro.find_shortest_path(start, end)
+            expected_path, expected_distance, _ = metro.find_shortest_path(start, end)
+            assert distance == expected_distance
+            assert path[0] == start and path[-1] == end
+
+    def test_popular_routes_match(self, precomputed_metro, metro):
+        """Test that warmed popular routes match freshly computed ones."""
+        for start, end in [("Rajiv Chowk", "Hauz Khas"), ("INA", "Kashmere Gate")]:
+            warmed = precomputed_metro.find_all_routes(start, end)
+            fresh = metro.find_all_routes(start, end)
+            assert [r.distance for r in warmed] == [r.distance for r in fresh]
+            assert [r.route_type for r in warmed] == [r.route_type for r in fresh]
+
+    def test_same_station(self, precomputed_metro):
+        """Test that a station-to-itself lookup returns just that station."""
+        path, distance, _ = precomputed_metro.find_shortest_path("Rajiv Chowk", "Rajiv Chowk")
+        assert path == ["Rajiv Chowk"]
+        assert distance == 0
+
+    def test_background_precompute(self):
+        """Test that routes are correct before and after background warm-up."""
+        metro = MetroGraph(precompute_routes=True, precompute_in_background=True)
+        _, before, _ = metro.find_shortest_path("Dwarka Sector 21", "Noida City Centre")
+        metro._precompute_thread.join()
+        assert metro._all_pairs_previous is not None
+        _, after, _ = metro.find_shortest_path("Dwarka Sector 21", "Noida City Centre")
+        assert before == after
+
+
 class TestAlternativeRoutes:
     """Tests for alternative route finding."""
     
-    @pytest.fixture
-    def metro(self):
-        return MetroGraph()
-    
     def test_find_all_routes_returns_results(self, metro):
         """Test that find_all_routes returns at least one route."""
         routes = metro.find_all_routes("Rajiv Chowk", "Kashmere Gate")
@@ -201,7 +300,15 @@ class TestAlternativeRoutes:
             assert isinstance(route.path, list)
             assert isinstance(route.distance, (int, float))
             assert isinstance(route.line_changes, list)
-            assert route.route_type in ['shortest', 'least_changes']
+            assert route.route_type in ['shortest', 'alternative', 'least_changes']
+
+    def test_all_routes_are_distinct(self, metro):
+        """Test that find_all_routes offers alternatives without repeating a route."""
+        routes = metro.find_all_routes("Dwarka Sector 21", "Noida City Centre")
+        assert routes[0].route_type == 'shortest'
+        assert 'alternative' in [r.route_type for r in routes]
+        paths = [tuple(r.path) for r in routes]
+        assert len(set(paths)) == len(paths)
     
     def test_least_changes_route(self, metro):
         """Test that least_changes route minimizes line changes."""
@@ -212,14 +319,19 @@ class TestAlternativeRoutes:
         # (or equal if they're the same route)
         assert len(changes2) <= len(changes1) or dist2 >= dist1
 
+    def test_least_changes_path_continuity(self, metro):
+        """Test that the least-changes path is continuous and ends correctly."""
+        path, distance, _ = metro.find_route_least_changes("Dwarka Sector 21", "Botanical Garden")
+        assert path[0] == "Dwarka Sector 21"
+        assert path[-1] == "Botanical Garden"
+        for current, next_station in zip(path, path[1:]):
+            assert next_station in metro.graph[current]
+        assert distance == round(sum(metro.graph[a][b] for a, b in zip(path, path[1:])), 2)
+
 
 class TestStationSearch:
     """Tests for station search functionality."""
     
-    @pytest.fixture
-    def metro(self):
-        return MetroGraph()
-    
     def test_search_returns_results(self, metro):
         """Test that search returns results for valid query."""
         results = metro.search_stations("Rajiv")
@@ -252,49 +364,85 @@ class TestStationSearch:
         results = metro.search_stations("Sector")
         assert len(results) <= 10  # Should be limited to 10
 
+    def test_search_matches_substring_scan(self, metro):
+        """Test that the trie returns the same matches as a plain substring scan."""
+        for query in ["ra", "Nagar", "sector 1", "chowk", "gate"]:
+            q = query.lower()
+            expected = sorted(
+                [s for s in metro.stations if q in s.lower()],
+                key=lambda s: (not s.lower().startswith(q), s),
+            )[:10]
+            assert metro.search_stations(query) == expected
+
+
+class TestKShortestPaths:
+    """Tests for Yen's k-shortest alternative routes."""
+
+    def test_routes_are_valid_and_ordered(self, metro):
+        """Test that alternatives are loopless, connected and sorted by distance."""
+        routes = metro.find_k_shortest_paths("Dwarka Sector 21", "Noida City Centre", k=3)
+        assert len(routes) == 3
+        _, shortest, _ = metro.find_shortest_path("Dwarka Sector 21", "Noida City Centre")
+        assert routes[0].distance == shortest
+        assert [r.distance for r in routes] == sorted(r.distance for r in routes)
+        for route in routes:
+            assert route.path[0] == "Dwarka Sector 21"
+            assert route.path[-1] == "Noida City Centre"
+            assert len(set(route.path)) == len(route.path)
+            for a, b in zip(route.path, route.path[1:]):
+                assert b in metro.graph[a]
+
+    def test_routes_are_different_enough(self, metro):
+        """Test that kept routes differ by at least min_difference."""
+        routes = metro.find_k_shortest_paths(
+            "Rajiv Chowk", "Kashmere Gate", k=3, min_difference=0.3
+        )
+        for i, first in enumerate(routes):
+            for second in routes[i + 1:]:
+                a, b = set(first.path), set(second.path)
+                assert 1 - len(a & b) / len(a | b) >= 0.3
+
+    def test_unknown_station(self, metro):
+        """Test that an unknown station gives no routes."""
+        assert metro.find_k_shortest_paths("Fake Station", "Rajiv Chowk") == []
+
 
 class TestRouteSummary:
     """Tests for route summary generation."""
     
-    @pytest.fixture
-    def metro(self):
-        return MetroGraph()
-    
     def test_summary_structure(self, metro):
         """Test that summary has all required fields."""
         path, distance, changes = metro.find_shortest_path("Rajiv Chowk", "Kashmere Gate")
         summary = metro.get_route_summary(path, distance, changes)
         
-        assert 'start' in summary
-        assert 'end' in summary
-        assert 'stations_count' in summary
-        assert 'distance_km' in summary
-        assert 'estimated_time_min' in summary
-        assert 'fare' in summary
+        assert isinstance(summary, RouteSummary)
+        summary_dict = summary.to_dict()
+        assert 'start' in summary_dict
+        assert 'end' in summary_dict
+        assert 'stations_count' in summary_dict
+        assert 'distance_km' in summary_dict
+        assert 'estimated_time_min' in summary_dict
+        assert 'fare' in summary_dict
     
     def test_summary_values(self, metro):
         """Test that summary values are correct."""
         path, distance, changes = metro.find_shortest_path("Rajiv Chowk", "Kashmere Gate")
         summary = metro.get_route_summary(path, distance, changes)
         
-        assert summary['start'] == "Rajiv Chowk"
-        assert summary['end'] == "Kashmere Gate"
-        assert summary['stations_count'] == len(path)
-        assert summary['distance_km'] == distance
+        assert summary.start == "Rajiv Chowk"
+        assert summary.end == "Kashmere Gate"
+        assert summary.stations_count == len(path)
+        assert summary.distance_km == distance
     
     def test_empty_path_summary(self, metro):
         """Test summary with empty path."""
         summary = metro.get_route_summary([], 0, [])
-        assert 'error' in summary
+        assert summary is None
 
 
 class TestEdgeCases:
     """Tests for edge cases and error handling."""
     
-    @pytest.fixture
-    def metro(self):
-        return MetroGraph()
-    
     def test_none_input(self, metro):
         """Test handling of None inputs."""
         path, distance, changes = metro.find_shortest_path(None, "Rajiv Chowk")